@@ -4,33 +4,188 @@ Chub.ai Smart Proxy - Multi-profile proxy for various AI providers
 Handles customer header support, modular endpoint setup, hybrid reasoning consideration
 """
 
+import functools
 import os
 import sys
 import json
+import pickle
 import yaml
 import requests
+from requests.adapters import HTTPAdapter
 from flask import Flask, request, Response, jsonify
 from pathlib import Path
-from datetime import datetime
+import time
+
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None  # fall back to the Flask dev server
+
+try:
+    # Optional: HTTP/2 to upstream providers (pip install 'httpx[http2]').
+    # requests/urllib3 are HTTP/1.1 only, so concurrent streams multiplex
+    # over one TLS connection only when httpx is available.
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    # Optional: much faster (de)serialization of the multi-KB chat payloads
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps_bytes(obj):
+        return orjson.dumps(obj)
+
+    def json_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+else:
+    json_loads = json.loads
+
+    def json_dumps_bytes(obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def json_pretty(obj):
+        return json.dumps(obj, indent=2)
 import logging
 from urllib.parse import urlparse
 
 app = Flask(__name__)
 
 # Configuration
+# CHUB_DEBUG=0 keeps the per-request hot path free of print/json.dumps cost;
+# 1 adds request/response tracing, 2 adds full payload dumps
+DEBUG = int(os.environ.get('CHUB_DEBUG', '0'))
+# Worker threads bound the number of concurrent in-flight chats; each one
+# spends nearly all its time blocked on upstream sockets (GIL released),
+# so raising this overlaps upstream I/O rather than burning CPU
+WORKER_THREADS = int(os.environ.get('CHUB_THREADS', '16'))
 PROXY_PORT = 8080
 CONFIG_FILE = 'config.yaml'
+CONFIG_CACHE_FILE = CONFIG_FILE + '.cache'
 profiles = {}
+_profile_names = frozenset()
 default_profile = None
-stats = {'requests': 0, 'last_profile': None, 'last_request': None}
+stats = {'requests': 0, 'last_profile': None, 'last_request_ts': None}
+
+# Headers the proxy manages itself, pre-lowercased and frozen at module
+# scope so the hot path never rebuilds them. 'connection' is stripped on
+# the way out so a client's "Connection: close" can't defeat keep-alive.
+_SKIP_REQUEST_HEADERS = frozenset(('host', 'authorization', 'content-length', 'connection'))
+_SKIP_RESPONSE_HEADERS = frozenset(('connection', 'transfer-encoding', 'content-encoding'))
 
 # Disable Flask's default logging for cleaner output
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
 
+class Http2Session:
+    """Drop-in stand-in for requests.Session backed by httpx with HTTP/2.
+
+    Exposes just the surface make_request and the response handling use
+    (request(), status_code, reason, headers, iter_content, content) so the
+    rest of the proxy doesn't care which transport is underneath.
+    """
+
+    def __init__(self, pool_maxsize=64):
+        # Raises ImportError if the h2 extra isn't installed
+        self._client = httpx.Client(
+            http2=True,
+            timeout=httpx.Timeout(300),
+            limits=httpx.Limits(max_keepalive_connections=pool_maxsize,
+                                max_connections=pool_maxsize),
+        )
+
+    def request(self, method, url, headers=None, data=None, stream=True,
+                timeout=None, verify=True, allow_redirects=False):
+        req = self._client.build_request(method, url, headers=headers, content=data)
+        try:
+            resp = self._client.send(req, stream=stream,
+                                     follow_redirects=allow_redirects)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e)
+        return Http2Response(resp)
+
+
+class Http2Response:
+    """Adapts httpx.Response to the small requests.Response surface we use"""
+
+    def __init__(self, resp):
+        self._resp = resp
+        self.status_code = resp.status_code
+        self.reason = resp.reason_phrase
+        self.headers = resp.headers
+
+    def iter_content(self, chunk_size=1024, decode_unicode=False):
+        return self._resp.iter_bytes(chunk_size)
+
+    @property
+    def content(self):
+        return self._resp.read()
+
+
+def make_upstream_session(num_profiles=1):
+    """Build the upstream HTTP client shared by every profile.
+
+    Prefers an HTTP/2 httpx client (one TLS connection multiplexing all
+    concurrent streams per host); falls back to a pooled keep-alive
+    requests.Session when httpx[http2] isn't installed.
+
+    The pool is sized so a full complement of worker threads can be
+    in flight at once (override with CHUB_POOL_SIZE), and pool_block=True
+    makes exhaustion queue instead of discarding connections and paying
+    the TLS handshake again.
+    """
+    pool_maxsize = int(os.environ.get('CHUB_POOL_SIZE',
+                                      str(max(64, WORKER_THREADS * 8))))
+    if httpx is not None:
+        try:
+            return Http2Session(pool_maxsize)
+        except ImportError:
+            pass  # httpx present but h2 extra missing
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max(4, num_profiles * 2),
+                          pool_maxsize=pool_maxsize,
+                          pool_block=True, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def make_url_builder(base_url):
+    """Classify a profile's base_url once and return a URL builder closure.
+
+    The shape of the upstream URL depends only on the profile, so the
+    branching (endpoint pinned vs plain API base) is resolved at config
+    load instead of on every request.
+    """
+    base = base_url.rstrip('/')
+
+    if '/chat/completions' in base_url or '/messages' in base_url:
+        # Profile pins a specific endpoint; only append genuinely extra
+        # path segments, stripping a duplicated chat/completions
+        def build_url(path):
+            if path and path != 'chat/completions':
+                extra = path.replace('chat/completions', '').strip('/')
+                if extra:
+                    return f"{base}/{extra}"
+            return base
+    else:
+        # Profile is just a base API URL, append the full path
+        def build_url(path):
+            return f"{base}/{path}" if path else base
+
+    return build_url
+
+
 def load_config():
     """Load configuration from YAML file"""
-    global profiles, default_profile
+    global profiles, _profile_names, default_profile
     
     config_path = Path(CONFIG_FILE)
     
@@ -41,11 +196,40 @@ def load_config():
         return False
     
     try:
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-        
+        config = None
+        mtime = config_path.stat().st_mtime
+        cache_path = Path(CONFIG_CACHE_FILE)
+
+        # Reuse the pickled parse if the YAML hasn't changed since -
+        # pure-Python YAML parsing is slow enough to notice on startup
+        if cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached_mtime, cached_config = pickle.load(f)
+                if cached_mtime == mtime:
+                    config = cached_config
+            except Exception:
+                config = None  # corrupt/stale cache, fall through to reparse
+
+        if config is None:
+            with open(config_path, 'r') as f:
+                # Prefer the C loader when libyaml is available
+                config = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+            try:
+                with open(cache_path, 'wb') as f:
+                    pickle.dump((mtime, config), f)
+            except OSError:
+                pass  # cache is best-effort only
+
         profiles = config.get('profiles', {})
+        _profile_names = frozenset(profiles)
         default_profile = config.get('default_profile', 'openrouter')
+        get_profile_from_path.cache_clear()
+
+        # One connection pool shared across profiles and worker threads -
+        # urllib3 pools are keyed per host anyway, and a single session
+        # avoids N half-warm pools for the same providers
+        shared_session = make_upstream_session(len(profiles))
         
         # Validate and process environment variables
         for profile_name, profile in profiles.items():
@@ -56,7 +240,34 @@ def load_config():
                     profile['api_key'] = os.environ.get(env_var, '')
                     if not profile['api_key']:
                         print(f"Warning: {env_var} not set for profile '{profile_name}'")
-        
+
+            # Profiles with none of the rewrite knobs can forward request
+            # bodies verbatim without a JSON parse/serialize round-trip
+            profile['_transform_ops'] = make_transform_ops(profile)
+            profile['_needs_transform'] = bool(profile['_transform_ops'])
+
+            # Pooled keep-alive session (HTTP/2 when available) so TCP+TLS
+            # handshakes are amortized across requests instead of paid on
+            # every proxied call
+            profile['_session'] = shared_session
+            profile['_build_url'] = make_url_builder(profile.get('base_url', ''))
+
+            # Outbound headers that never vary per request (profile headers
+            # plus the Bearer token) are assembled once here
+            static_headers = dict(profile.get('headers', {}))
+            if profile.get('api_key'):
+                static_headers['Authorization'] = f"Bearer {profile['api_key']}"
+            profile['_static_headers'] = static_headers
+
+            # Canned JSON for the browser-facing GET /<profile>/ hint, so
+            # health-probe traffic costs zero serialization work
+            profile['_hint_bytes'] = json_dumps_bytes({
+                'message': f"Profile '{profile_name}' is active",
+                'base_url': profile.get('base_url'),
+                'status': 'ready',
+                'hint': 'Append /models to list available models',
+            })
+
         return True
     except Exception as e:
         print(f"Error loading config: {e}")
@@ -90,103 +301,159 @@ def create_default_config():
     with open(CONFIG_FILE, 'w') as f:
         yaml.dump(default_config, f, default_flow_style=False, sort_keys=False)
 
+@functools.lru_cache(maxsize=256)
 def get_profile_from_path(path):
-    """Extract profile name from URL path"""
+    """Extract profile name from URL path.
+
+    Chub clients hammer the same handful of paths, so the result is
+    memoized; load_config clears the cache when routing tables change.
+    """
     # Remove leading/trailing slashes and split
     clean = path.strip('/')
     if not clean:
         return default_profile, ''
-    
-    parts = clean.split('/')
-    
-    # Check if first part is a profile name
-    if parts[0] in profiles:
-        # Return profile and the rest of the path
-        remaining = '/'.join(parts[1:]) if len(parts) > 1 else ''
-        return parts[0], remaining
-    
+
+    # partition avoids the split-list and re-join allocations of the
+    # obvious split('/') approach - this runs on every request
+    head, _, tail = clean.partition('/')
+    if head in _profile_names:
+        return head, tail
+
     # No profile in path, use default and return full path
     return default_profile, clean
 
-def transform_request(data, profile):
-    """Transform request based on profile settings"""
-    if not isinstance(data, dict):
-        return data
-    
+def make_transform_ops(profile):
+    """Specialize the request transform for one profile at config load.
+
+    Profiles are immutable after load, so the 'force_model' in profile /
+    'model_map' in profile / 'reasoning' in profile checks are resolved
+    once here; per request only the ops this profile actually uses run.
+    Each op mutates the payload in place and returns True if it changed it.
+    """
+    ops = []
+
     # Handle model forcing
     if 'force_model' in profile:
-        data['model'] = profile['force_model']
-    
+        forced = profile['force_model']
+
+        def force_model(data):
+            if data.get('model') != forced:
+                data['model'] = forced
+                return True
+            return False
+        ops.append(force_model)
+
     # Handle model mapping (for DeepSeek direct)
-    if 'model_map' in profile and 'model' in data:
-        model = data.get('model', '')
-        if model in profile['model_map']:
-            data['model'] = profile['model_map'][model]
-    
+    if 'model_map' in profile:
+        model_map = profile['model_map']
+
+        def map_model(data):
+            model = data.get('model', '')
+            if model in model_map:
+                data['model'] = model_map[model]
+                return True
+            return False
+        ops.append(map_model)
+
     # Handle reasoning parameters - simple passthrough
     # OpenRouter will apply them automatically to compatible models
     if 'reasoning' in profile:
-        data['reasoning'] = profile['reasoning']
-    
-    # Handle max_tokens vs max_completion_tokens
+        reasoning = profile['reasoning']
+
+        def set_reasoning(data):
+            if data.get('reasoning') != reasoning:
+                data['reasoning'] = reasoning
+                return True
+            return False
+        ops.append(set_reasoning)
+
+    return ops
+
+
+def transform_request(data, profile):
+    """Transform request based on profile settings.
+
+    Mutates data in place and returns (data, changed) - cheaper than
+    handing callers a copy and making them deep-compare the whole payload
+    just to find out whether anything was rewritten.
+    """
+    if not isinstance(data, dict):
+        return data, False
+
+    changed = False
+    for op in profile['_transform_ops']:
+        if op(data):
+            changed = True
+
+    # Handle max_tokens vs max_completion_tokens - depends on the payload,
+    # not the profile, so it can't be specialized away at load time
     if 'max_completion_tokens' in data and 'max_tokens' not in data:
         data['max_tokens'] = data.pop('max_completion_tokens')
-    
-    return data
+        changed = True
 
-def make_request(profile, path, method, headers, data, query_string):
-    """Make request to the target API"""
-    # Build target URL
-    base_url = profile.get('base_url', '')
-    
-    # If base_url already has a path (like /chat/completions), use it as base
-    # Otherwise, append the incoming path
-    if '/chat/completions' in base_url or '/messages' in base_url:
-        # Profile has a specific endpoint, only append additional path if exists
-        if path and path != 'chat/completions':
-            # Remove chat/completions from path if it's already in base_url
-            path = path.replace('chat/completions', '').strip('/')
-            if path:
-                target_url = f"{base_url.rstrip('/')}/{path}"
+    return data, changed
+
+def log_response_preview(body, total_bytes):
+    """Log a (possibly truncated) non-streaming response body (debug only)"""
+    if DEBUG >= 2:
+        try:
+            # Limit output for huge responses like model lists
+            json_str = json_pretty(json_loads(body))
+            print(f"\nResponse BODY:")
+            if len(json_str) > 8000:
+                print(json_str[:8000])
+                print(f"\n... [truncated - {len(json_str)} total characters]")
             else:
-                target_url = base_url
-        else:
-            target_url = base_url
-    else:
-        # Profile is just a base API URL, append the full path
-        target_url = f"{base_url.rstrip('/')}/{path}" if path else base_url
-    
-    # Add query string if present
+                print(json_str)
+        except ValueError:
+            # Not JSON or error
+            if total_bytes < 1000:
+                print(f"\nResponse BODY (non-JSON):")
+                print(body.decode('utf-8', errors='ignore'))
+            else:
+                print(f"\nResponse BODY: [non-JSON, {total_bytes} bytes]")
+
+    # Check for reasoning in response - byte-level substring probes run at
+    # C speed (memmem), so no JSON parse just to peek inside messages
+    if b'"reasoning"' in body or b'"reasoning_content"' in body:
+        print(f"\nREASONING DETECTED in response")
+    if b'<think>' in body or b'</think>' in body:
+        print(f"\nTHINKING TAGS in response content")
+
+    print(f"{'='*60}\n")
+
+def make_request(profile, path, method, headers, data, query_string, is_streaming=True):
+    """Make request to the target API"""
+    # Build target URL via the builder precomputed at config load
+    target_url = profile['_build_url'](path)
+
+    # Add query string if present. Query strings are URL-encoded ASCII,
+    # so skip the UTF-8 decoder entirely
     if query_string:
-        target_url += f"?{query_string.decode()}"
+        target_url += '?' + query_string.decode('ascii', 'ignore')
     
     # Debug log the final URL
-    print(f"[DEBUG] Target URL: {target_url}")
-    
-    # Prepare headers
-    proxy_headers = {}
-    
-    # Add profile-specific headers
-    if 'headers' in profile:
-        proxy_headers.update(profile['headers'])
-    
-    # Add API key
-    if 'api_key' in profile and profile['api_key']:
-        proxy_headers['Authorization'] = f"Bearer {profile['api_key']}"
+    if DEBUG >= 1:
+        print(f"[DEBUG] Target URL: {target_url}")
     
+    # Prepare headers, starting from the static set precomputed at load
+    # (profile headers + Authorization)
+    proxy_headers = dict(profile['_static_headers'])
+
     # Pass through original headers (skip problematic ones)
-    skip_headers = {'host', 'authorization', 'content-length'}
-    for key, value in headers:
-        if key.lower() not in skip_headers:
-            proxy_headers[key] = value
-    
-    # Make the request
-    response = requests.request(
+    proxy_headers.update(
+        {key: value for key, value in headers
+         if key.lower() not in _SKIP_REQUEST_HEADERS})
+
+    # Make the request on the profile's pooled session
+    response = profile['_session'].request(
         method=method,
         url=target_url,
         headers=proxy_headers,
         data=data,
-        stream=True,
+        # Only SSE completions need the incremental machinery; short JSON
+        # replies (/models etc.) are cheaper fetched in one go
+        stream=is_streaming,
         timeout=300,
         verify=True,
         allow_redirects=False
@@ -213,21 +480,18 @@ def proxy_request(path):
     if request.method == 'OPTIONS':
         return '', 204
     
-    # Handle browser hitting profile root (e.g., /openrouter/)
+    # Handle browser hitting profile root (e.g., /openrouter/) with the
+    # response bytes canned at config load
     if request.method == 'GET' and path in profiles and not request.query_string:
-        return jsonify({
-            "message": f"Profile '{path}' is active",
-            "base_url": profiles[path].get('base_url'),
-            "status": "ready",
-            "hint": "Append /models to list available models"
-        }), 200
+        return Response(profiles[path]['_hint_bytes'], status=200,
+                        mimetype='application/json')
     
     # Get profile from path
     profile_name, clean_path = get_profile_from_path(path)
     
-    # Always show debug for path routing
-    print(f"\n[DEBUG] Raw path: '{path}'")
-    print(f"[DEBUG] Extracted: profile='{profile_name}', clean_path='{clean_path}'")
+    if DEBUG >= 1:
+        print(f"\n[DEBUG] Raw path: '{path}'")
+        print(f"[DEBUG] Extracted: profile='{profile_name}', clean_path='{clean_path}'")
     
     if profile_name not in profiles:
         print(f"\nProfile not found: '{profile_name}'")
@@ -248,16 +512,18 @@ def proxy_request(path):
     # Update stats
     stats['requests'] += 1
     stats['last_profile'] = profile_name
-    stats['last_request'] = datetime.now().strftime('%H:%M:%S')
+    # Raw float is near-free; only the debug log formats it
+    stats['last_request_ts'] = time.time()
     
     # Log incoming request
-    print(f"\n{'='*60}")
-    print(f"[{stats['last_request']}] INCOMING REQUEST")
-    print(f"Profile: {profile_name}")
-    print(f"Method: {request.method}")
-    print(f"Path: {clean_path}")
-    if request.query_string:
-        print(f"Query: {request.query_string.decode()}")
+    if DEBUG >= 1:
+        print(f"\n{'='*60}")
+        print(f"[{time.strftime('%H:%M:%S', time.localtime(stats['last_request_ts']))}] INCOMING REQUEST")
+        print(f"Profile: {profile_name}")
+        print(f"Method: {request.method}")
+        print(f"Path: {clean_path}")
+        if request.query_string:
+            print(f"Query: {request.query_string.decode()}")
     
     # Log headers (filter sensitive ones) - commented out for cleaner output
     # print(f"\nHeaders IN:")
@@ -274,48 +540,68 @@ def proxy_request(path):
     is_streaming = False
     
     if request.method == 'GET':
-        if 'models' in clean_path:
-            print(f"\nRequest type: GET → Fetching model list")
-        else:
-            print(f"\nRequest type: GET → {clean_path or 'root'}")
+        if DEBUG >= 1:
+            if 'models' in clean_path:
+                print(f"\nRequest type: GET → Fetching model list")
+            else:
+                print(f"\nRequest type: GET → {clean_path or 'root'}")
     elif request.method in ['POST', 'PUT', 'PATCH']:
         data = request.get_data()
-        try:
-            # Parse JSON data
-            original_json_data = json.loads(data) if data else {}
-            
-            # Check if streaming is enabled
-            is_streaming = original_json_data.get('stream', False)
-            
-            # Log original payload
-            print(f"\nPayload IN (original):")
-            print(json.dumps(original_json_data, indent=2))
-            
-            # Transform the request
-            transformed_json_data = transform_request(original_json_data.copy(), profile)
-            
-            # Log transformed payload if different
-            if transformed_json_data != original_json_data:
-                print(f"\nPayload OUT (transformed):")
-                print(json.dumps(transformed_json_data, indent=2))
-            else:
-                print(f"\nPayload OUT: [unchanged]")
-            
-            data = json.dumps(transformed_json_data).encode('utf-8')
-            
-        except json.JSONDecodeError:
-            # Not JSON, pass through as-is
-            print(f"\nPayload: [non-JSON data, {len(data)} bytes]")
-            pass
+
+        # Only round-trip the body through json when the profile actually
+        # rewrites it (or the max_completion_tokens rename might apply) -
+        # large chat payloads are forwarded verbatim otherwise
+        if profile['_needs_transform'] or (data and b'max_completion_tokens' in data):
+            try:
+                # Parse JSON data
+                original_json_data = json_loads(data) if data else {}
+
+                # Check if streaming is enabled
+                is_streaming = original_json_data.get('stream', False)
+
+                # Log original payload (the dumps only run when enabled)
+                if DEBUG >= 2:
+                    print(f"\nPayload IN (original):")
+                    print(json_pretty(original_json_data))
+
+                # Transform the request (in place - no copy needed)
+                transformed_json_data, changed = transform_request(original_json_data, profile)
+
+                # Log transformed payload if different
+                if DEBUG >= 2:
+                    if changed:
+                        print(f"\nPayload OUT (transformed):")
+                        print(json_pretty(transformed_json_data))
+                    else:
+                        print(f"\nPayload OUT: [unchanged]")
+
+                data = json_dumps_bytes(transformed_json_data)
+
+            except ValueError:
+                # Not JSON, pass through as-is
+                if DEBUG >= 1:
+                    print(f"\nPayload: [non-JSON data, {len(data)} bytes]")
+                pass
+        else:
+            # Fast path: nothing to rewrite, but we still need the stream
+            # flag; the byte probe keeps the parse off bodies without it
+            if data and b'"stream"' in data:
+                try:
+                    is_streaming = json_loads(data).get('stream', False)
+                except ValueError:
+                    pass
+            if DEBUG >= 1:
+                print(f"\nPayload: [forwarded verbatim, {len(data) if data else 0} bytes]")
     
     try:
         # Make the request
-        response = make_request(profile, clean_path, request.method, request.headers, data, request.query_string)
+        response = make_request(profile, clean_path, request.method, request.headers, data, request.query_string, is_streaming)
         
         # Log response status
-        print(f"\n{'─'*60}")
-        print(f"RESPONSE:")
-        print(f"Status: {response.status_code} {response.reason}")
+        if DEBUG >= 1:
+            print(f"\n{'─'*60}")
+            print(f"RESPONSE:")
+            print(f"Status: {response.status_code} {response.reason}")
         
         # Log response headers - commented out for cleaner output
         # print(f"\nHeaders RETURNED:")
@@ -325,64 +611,34 @@ def proxy_request(path):
         
         # Handle response based on streaming
         if is_streaming:
-            print(f"\nResponse: [STREAMING ENABLED - content not logged]")
-            print(f"{'='*60}\n")
+            if DEBUG >= 1:
+                print(f"\nResponse: [STREAMING ENABLED - content not logged]")
+                print(f"{'='*60}\n")
             
-            # Stream the response
+            # Stream the response. chunk_size=None forwards whatever each
+            # socket read returned: no worse latency per SSE event, far
+            # fewer Python-level yields than fixed 1 KiB slices
             def generate():
-                for chunk in response.iter_content(chunk_size=1024, decode_unicode=False):
+                for chunk in response.iter_content(chunk_size=None):
                     if chunk:
                         yield chunk
+            body = generate()
         else:
-            # Non-streaming: capture and log the full response
+            # Non-streaming: the body was fetched eagerly (stream=False in
+            # make_request), so hand the bytes straight to Flask without a
+            # generator wrapper or iter_content state machine
             response_content = response.content
-            
-            try:
-                response_json = json.loads(response_content)
-                print(f"\nResponse BODY:")
-                # Limit output for huge responses like model lists
-                json_str = json.dumps(response_json, indent=2)
-                if len(json_str) > 8000:
-                    print(json_str[:8000])
-                    print(f"\n... [truncated - {len(json_str)} total characters]")
-                else:
-                    print(json_str)
-                
-                # Check for reasoning in response
-                if 'choices' in response_json:
-                    for choice in response_json.get('choices', []):
-                        if 'message' in choice:
-                            msg = choice['message']
-                            if 'reasoning' in msg or 'reasoning_content' in msg:
-                                print(f"\nREASONING DETECTED in response")
-                            content = msg.get('content', '')
-                            if '<think>' in content or '</think>' in content:
-                                print(f"\nTHINKING TAGS in response content")
-                
-            except json.JSONDecodeError:
-                # Not JSON or error
-                if len(response_content) < 1000:
-                    print(f"\nResponse BODY (non-JSON):")
-                    print(response_content.decode('utf-8', errors='ignore'))
-                else:
-                    print(f"\nResponse BODY: [non-JSON, {len(response_content)} bytes]")
-            
-            print(f"{'='*60}\n")
-            
-            # Return the captured content
-            def generate():
-                yield response_content
+            if DEBUG >= 1:
+                log_response_preview(response_content, len(response_content))
+            body = response_content
         
         # Prepare response headers
-        response_headers = []
-        skip_response_headers = {'connection', 'transfer-encoding', 'content-encoding'}
-        
-        for key, value in response.headers.items():
-            if key.lower() not in skip_response_headers:
-                response_headers.append((key, value))
+        response_headers = [
+            (key, value) for key, value in response.headers.items()
+            if key.lower() not in _SKIP_RESPONSE_HEADERS]
         
         return Response(
-            generate(),
+            body,
             status=response.status_code,
             headers=response_headers
         )
@@ -451,7 +707,16 @@ if __name__ == '__main__':
     print_startup_message()
     
     try:
-        app.run(host='127.0.0.1', port=PROXY_PORT, debug=True)
+        if waitress_serve is not None:
+            # Production server: threaded, with keep-alive to the client,
+            # so concurrent streaming chats don't serialize behind each other
+            waitress_serve(app, host='127.0.0.1', port=PROXY_PORT,
+                           threads=WORKER_THREADS, connection_limit=1000,
+                           channel_timeout=600)
+        else:
+            print("⚠️  waitress not installed (pip install waitress) - using the")
+            print("   single-threaded Flask dev server as a fallback.")
+            app.run(host='127.0.0.1', port=PROXY_PORT)
     except KeyboardInterrupt:
         print("\n\nProxy stopped. Goodbye!")
     except Exception as e: